@@ -17,8 +17,28 @@ except ImportError:
     print("debugpy module not found. Make sure to install")
     sys.exit(1)
 
+# Read DAP messages on a background thread, so the trace function never touches the socket.
+# Off by default: needs _thread and a debugpy version whose listen() accepts io_thread.
+IO_THREAD = False
+
 wlan = network.WLAN()
 
+# seconds to wait for the DAP configurationDone request before running the target
+CONFIGURATION_TIMEOUT = 10
+
+
+def start_listening(host, port):
+    """Start the debug server, with the DAP I/O thread if requested and supported."""
+    if IO_THREAD:
+        try:
+            debugpy.listen(host=host, port=port, io_thread=True)
+            return True
+        except TypeError:
+            print("debugpy.listen() has no io_thread option, DAP messages are read by the trace function")
+    debugpy.listen(host=host, port=port)
+    return False
+
+
 _banner = r"""
  _____  _______ ______ _______ _______ ______ ___ ___ 
 |     \|    ___|   __ \   |   |     __|   __ \   |   |
@@ -49,7 +69,8 @@ def waitfor_debugger():
     try:
         ipv4 = wlan.ipconfig('addr4')[0]
 
-        debugpy.listen(host=ipv4, port=5678)
+        io_thread = start_listening(ipv4, 5678)
+        print(f"DAP I/O thread: {io_thread}")
         print("Debug server attached on 127.0.0.1:5678")
         print("Connecting back to VS Code debugger now...")
 
@@ -60,10 +81,16 @@ def waitfor_debugger():
 
         debugpy.debug_this_thread()
 
-        # Give VS Code a moment to set breakpoints after attach
-        print("\nGiving VS Code time to set breakpoints...")
-        import time
-        time.sleep(2)
+        # Wait until VS Code has set its breakpoints and sent configurationDone
+        print("\nWaiting for VS Code to finish configuration...")
+        try:
+            if not debugpy.wait_for_client(timeout=CONFIGURATION_TIMEOUT):
+                print(f"No configurationDone after {CONFIGURATION_TIMEOUT}s, continuing")
+        except TypeError:
+            # debugpy without the configurationDone handshake
+            print("Giving VS Code time to set breakpoints...")
+            import time
+            time.sleep(2)
 
         _method = getattr(_target, target_method, None)
         if _method is None:
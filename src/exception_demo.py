@@ -0,0 +1,25 @@
+"""Raise and handle a few exceptions, to exercise exception breakpoints."""
+
+ATTEMPTS = 5
+
+
+def connect(attempt):
+    if attempt < ATTEMPTS - 1:
+        raise ValueError(f"Invalid configuration on attempt {attempt}")
+    raise OSError(113)  # EHOSTUNREACH
+
+
+def main():
+    print("Running exception demo...")
+    for attempt in range(ATTEMPTS):
+        try:
+            connect(attempt)
+        except ValueError as e:
+            print(f"Handled: {e}")
+        except OSError as e:
+            print(f"Network error: {e}")
+    print("Exception demo finished")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""A loop that hits the same line many times, to exercise conditional breakpoints."""
+
+HITS = 10_000
+
+
+def count_up(n=HITS):
+    total = 0
+    for i in range(n):
+        total += i  # <-- conditional breakpoint here (line 9)
+    return total
+
+
+def main():
+    print("Running hit loop...")
+    total = count_up()
+    print(f"Total: {total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""A long running loop, to measure pause latency and per-line tracing overhead."""
+
+import time
+
+ITERATIONS = 10_000
+DURATION_S = 30
+REPORT_MS = 100
+
+
+def spin(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def never_called():
+    print("This line is never executed")  # <-- breakpoint that keeps this file traced
+
+
+def main(duration_s=DURATION_S):
+    print("Running pause demo...")
+    # run for a fixed wall-clock time, so requests sent while it runs do not race its exit
+    t_end = time.ticks_add(time.ticks_ms(), duration_s * 1000)
+    round_nr = 0
+    while time.ticks_diff(t_end, time.ticks_ms()) > 0:
+        # report at most every REPORT_MS, so a fast untraced run does not flood stdout
+        iterations = 0
+        t_start = time.ticks_us()
+        while time.ticks_diff(time.ticks_us(), t_start) < REPORT_MS * 1000:
+            spin(ITERATIONS)
+            iterations += ITERATIONS
+        elapsed = time.ticks_diff(time.ticks_us(), t_start)
+        print(f"Round {round_nr}: {elapsed / iterations:.2f} us per iteration")
+        round_nr += 1
+    print("Pause demo finished")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""Compare stepping over a heavy library call with running it freely under the debugger."""
+
+import time
+
+import pystone
+
+LOOPS = 5000
+
+
+def main():
+    print("Running step over benchmark...")
+    t_start = time.ticks_ms()
+    pystone.pystones(LOOPS)
+    print(f"Free run: {time.ticks_diff(time.ticks_ms(), t_start)} ms")
+
+    pystone.pystones(LOOPS)  # <-- step over this line (line 16)
+    print("Step over completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 import time
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 
 import pytest
 from helpers import PerfServer
@@ -33,6 +33,26 @@ def remote_root(request):
         yield "./src"
 
 
+@pytest.fixture
+def logpoint_flush(request):
+    # attach
+    if hasattr(request, "param"):
+        yield request.param
+    else:
+        # Default value if not parameterized: use the flush policy of the debuggee
+        yield None
+
+
+@pytest.fixture
+def stop_bundle(request):
+    # attach
+    if hasattr(request, "param"):
+        yield request.param
+    else:
+        # Default value if not parameterized: plain stopped events
+        yield False
+
+
 @pytest.fixture
 def attach_server(
     fake_vscode_server: PerfServer,
@@ -40,6 +60,8 @@ def attach_server(
     logToFile: bool,
     local_root: str,
     remote_root: str,
+    logpoint_flush: Optional[Dict],
+    stop_bundle: bool,
 ):
     """
     Setup the fake_vscode_server for testing
@@ -50,6 +72,8 @@ def attach_server(
     - attach_delay: The delay to wait before running the server.
     - logToFile: Whether to log to file.
     - free_tcp_port: The port to bind the server to.
+    - logpoint_flush: The flush policy for logpoint output, e.g. {"maxBytes": 512, "intervalMs": 100, "onStop": True}.
+    - stop_bundle: Whether stopped events carry the stack, scopes and first page of top frame locals.
     """
     server = fake_vscode_server
     assert server is not None, "Server should not be None"
@@ -64,33 +88,35 @@ def attach_server(
     client = server.client
 
     # Start of test
-    client.send_request(
-        "attach",
-        {
-            "name": "Attach to MicroPython",
-            # "preLaunchTask": "foo_bar",
-            "type": "debugpy",
-            "request": "attach",
-            "connect": {"host": "localhost", "port": free_tcp_port},
-            "pathMappings": [
-                {
-                    "localRoot": local_root,
-                    "remoteRoot": remote_root,
-                }
-            ],
-            "workspaceFolder": "/home/jos/mp_debugpy",
-            "justMyCode": True,
-            "logToFile": logToFile,
-            # "__configurationTarget": 6,
-            "clientOS": "unix",
-            "debugOptions": [
-                "RedirectOutput",
-                "ShowReturnValue",
-            ],
-            "showReturnValue": True,
-            "__sessionId": "11976c7b-f770-484d-a445-115e82e3abcb",
-        },
-    )
+    attach_args = {
+        "name": "Attach to MicroPython",
+        # "preLaunchTask": "foo_bar",
+        "type": "debugpy",
+        "request": "attach",
+        "connect": {"host": "localhost", "port": free_tcp_port},
+        "pathMappings": [
+            {
+                "localRoot": local_root,
+                "remoteRoot": remote_root,
+            }
+        ],
+        "workspaceFolder": "/home/jos/mp_debugpy",
+        "justMyCode": True,
+        "logToFile": logToFile,
+        # "__configurationTarget": 6,
+        "clientOS": "unix",
+        "debugOptions": [
+            "RedirectOutput",
+            "ShowReturnValue",
+        ],
+        "showReturnValue": True,
+        "__sessionId": "11976c7b-f770-484d-a445-115e82e3abcb",
+    }
+    if logpoint_flush is not None:
+        attach_args["logpointFlush"] = logpoint_flush
+    if stop_bundle:
+        attach_args["stopBundle"] = True
+    client.send_request("attach", attach_args)
     # do not add a wait or processing at this point
     yield server
 
@@ -1,7 +1,7 @@
 import time
 from pathlib import Path
 from pickle import TRUE
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from dap import ThreadedServer
 
@@ -21,37 +21,46 @@ class PerfServer(ThreadedServer):
         self.rcv_messages.clear()
 
 
-def wait_for_msg(server, *, count=0, event="", response="", timeout=5):
-    """Wait for a specific message, or number of messages, to be received."""
+def wait_for_msg(server, *, count=0, event="", response="", timeout=5, interval=0.1):
+    """Wait for a specific message, or number of messages, to be received.
+    Use a small interval when timing requests, the default polls every 100 ms.
+    """
     t1 = time.time()
     server.run_single()
     while not server.rcv_messages and time.time() - t1 < timeout:
-        time.sleep(0.1)
+        time.sleep(interval)
         server.run_single()
     if count > 0:
         while time.time() - t1 < timeout and len(server.rcv_messages) < count:
-            time.sleep(0.1)
+            time.sleep(interval)
             server.run_single()
     elif event:
         while time.time() - t1 < timeout and not (
             server.rcv_messages[-1].type == "event" and server.rcv_messages[-1].event == event
         ):
-            time.sleep(0.1)
+            time.sleep(interval)
             server.run_single()
     elif response:
         while time.time() - t1 < timeout and not (
             server.rcv_messages[-1].type == "response" and server.rcv_messages[-1].command == response
         ):
-            time.sleep(0.1)
+            time.sleep(interval)
             server.run_single()
     return len(server.rcv_messages) >= count
 
 
+def last_response(server: PerfServer, command: str):
+    """Return the last response received for a command, or None."""
+    responses = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == command]
+    return responses[-1] if responses else None
+
+
 def set_breakpoints(
     server: PerfServer,
     source_file: str,
     bp_lines: List[int],
     wait=False,
+    **bp_options,
 ):
     """Set breakpoints in the debug server.
     This fixture uses the attach_server fixture to set
@@ -59,6 +68,7 @@ def set_breakpoints(
     It can be parameterized with:
     - source_file: The source file to set breakpoints in.
     - bp_lines: The lines to set breakpoints on.
+    - bp_options: Extra SourceBreakpoint fields for each breakpoint, e.g. condition="i == 5".
     """
     client = server.client
 
@@ -110,7 +120,7 @@ def set_breakpoints(
     #   "sourceModified": false
     # }
 
-    breakpoints = [{"line": line} for line in bp_lines]
+    breakpoints = [{"line": line, **bp_options} for line in bp_lines]
     client.set_breakpoints(
         source={"name": Path(source_file).name, "path": source_file},
         breakpoints=breakpoints,
@@ -122,3 +132,103 @@ def set_breakpoints(
     if not wait:
         return True
     return wait_for_msg(server, response="setBreakpoints")
+
+
+def configuration_done(server: PerfServer, wait=False):
+    """Send configurationDone, as VS Code does after setting the initial breakpoints.
+    The launcher waits for this request before it runs the target.
+    """
+    server.client.configuration_done()
+    if not wait:
+        return True
+    return wait_for_msg(server, response="configurationDone")
+
+
+def set_function_breakpoints(
+    server: PerfServer,
+    names: List[str],
+    wait=False,
+):
+    """Set function breakpoints in the debug server.
+    - names: qualified function names, e.g. "building.DoorController.toggle".
+    """
+    client = server.client
+    client.set_function_breakpoints(breakpoints=[{"name": name} for name in names])
+    if not wait:
+        return True
+    return wait_for_msg(server, response="setFunctionBreakpoints")
+
+
+def set_exception_breakpoints(
+    server: PerfServer,
+    filters: List[str],
+    exception_types: Optional[List[str]] = None,
+    wait=False,
+):
+    """Set exception breakpoints in the debug server.
+    - filters: the exception filters to enable, "raised" and/or "uncaught".
+    - exception_types: only break on these exception classes, e.g. ["OSError"].
+    """
+    client = server.client
+    arguments: Dict = {"filters": filters}
+    if exception_types:
+        arguments["exceptionOptions"] = [
+            {"path": [{"names": exception_types}], "breakMode": "always"},
+        ]
+    client.send_request("setExceptionBreakpoints", arguments)
+    if not wait:
+        return True
+    return wait_for_msg(server, response="setExceptionBreakpoints")
+
+
+def wait_for_output(process, text: str, *, server=None, timeout=5) -> str:
+    """Wait for a specific text to appear in the stdout of the debuggee process.
+    The stdout of the micropython_debuggee fixture is non-blocking, so this polls
+    the pipe and keeps the DAP connection serviced while waiting.
+    Returns all output that was read.
+    """
+    output = ""
+    t1 = time.time()
+    while time.time() - t1 < timeout:
+        try:
+            chunk = process.stdout.read(1024) if process.stdout else None
+            if chunk:
+                output += chunk
+        except (BlockingIOError, OSError):
+            pass  # No data available
+        if text in output or process.poll() is not None:
+            break
+        if server:
+            server.run_single()
+        time.sleep(0.1)
+    return output
+
+
+class StopBundleStandIn:
+    """Stand-in for a host-side proxy in stop bundle mode.
+    Holds the bundle of the last stopped event and answers the follow-up requests
+    VS Code sends after a stop from it, without a round trip to the device.
+    """
+
+    def __init__(self):
+        self.bundle: Optional[Dict] = None
+
+    def on_stopped(self, body: Dict):
+        self.bundle = body.get("bundle")
+
+    def answer(self, command: str, arguments: Optional[Dict] = None) -> Optional[Dict]:
+        """Return the response body for a request, or None if it has to be sent to the device."""
+        if not self.bundle:
+            return None
+        arguments = arguments or {}
+        frames = self.bundle["stackFrames"]
+        if command == "threads":
+            return {"threads": self.bundle["threads"]}
+        if command == "stackTrace" and not arguments.get("startFrame"):
+            return {"stackFrames": frames, "totalFrames": len(frames)}
+        if command == "scopes" and arguments.get("frameId") == frames[0]["id"]:
+            return {"scopes": self.bundle["scopes"]}
+        locals_ref = self.bundle["scopes"][0]["variablesReference"]
+        if command == "variables" and arguments.get("variablesReference") == locals_ref and "start" not in arguments:
+            return {"variables": self.bundle["variables"]}
+        return None
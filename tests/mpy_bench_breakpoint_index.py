@@ -0,0 +1,87 @@
+"""
+Microbenchmark for the cost of PdbAdapter.should_stop() with many breakpoints.
+
+The breakpoint index is rebuilt once per setBreakpoints request and keyed on the
+device-side co_filename, so the cost of a line check should stay flat when the
+number of breakpoints grows from 1 to 1000, spread across 50 files.
+
+Run with the settrace firmware:
+    MICROPYPATH=micropython-lib/python-ecosys/debugpy ./mpy.sh tests/mpy_bench_breakpoint_index.py
+"""
+
+import sys
+import time
+
+sys.path.append("micropython-lib/python-ecosys/debugpy")
+from debugpy.server.pdb_adapter import PdbAdapter
+
+N_FILES = 50
+N_CHECKS = 2000
+BREAKPOINT_COUNTS = (1, 10, 100, 1000)
+
+
+class MockCode:
+    def __init__(self, filename):
+        # on the device co_filename is an interned qstr
+        self.co_filename = filename
+        self.co_name = "bench"
+
+
+class MockFrame:
+    def __init__(self, code, lineno):
+        self.f_code = code
+        self.f_lineno = lineno
+        self.f_back = None
+        self.f_globals = {}
+        self.f_locals = {}
+
+
+def request_filename(filename):
+    """Return an equal but distinct str object, like a path decoded from a setBreakpoints request."""
+    return "".join(list(filename))
+
+
+def setup_adapter(filenames, n_breakpoints):
+    """Create an adapter with n_breakpoints spread evenly across the files.
+    The filenames are passed as fresh strings, so an index that relies on identity with co_filename
+    falls back to equality (or re-normalizes the string) and that cost shows up in the numbers.
+    """
+    pdb_adapter = PdbAdapter()
+    per_file = {}
+    for i in range(n_breakpoints):
+        per_file.setdefault(filenames[i % N_FILES], []).append(10 + i // N_FILES)
+    for filename, lines in per_file.items():
+        pdb_adapter.set_breakpoints(request_filename(filename), [{"line": line} for line in lines])
+    return pdb_adapter
+
+
+def time_checks(pdb_adapter, frames):
+    """Return the average time in us of a single should_stop line check."""
+    n_frames = len(frames)
+    t_start = time.ticks_us()
+    for i in range(N_CHECKS):
+        pdb_adapter.should_stop(frames[i % n_frames], "line", None)
+    return time.ticks_diff(time.ticks_us(), t_start) / N_CHECKS
+
+
+def run_benchmark():
+    filenames = [f"/usr/micropython/module_{i:02}.py" for i in range(N_FILES)]
+    codes = [MockCode(filename) for filename in filenames]
+    cold_code = MockCode("/usr/micropython/no_breakpoints.py")
+
+    print("Breakpoint check cost (us per line event)")
+    print("=" * 50)
+    print(f"{'breakpoints':>12} {'miss line':>12} {'miss file':>12}")
+    for n_breakpoints in BREAKPOINT_COUNTS:
+        pdb_adapter = setup_adapter(filenames, n_breakpoints)
+        # lines that are in a file with breakpoints, but not on a breakpoint
+        miss_line = [MockFrame(code, 1) for code in codes]
+        # lines in a file without any breakpoints
+        miss_file = [MockFrame(cold_code, 10)]
+        t_line = time_checks(pdb_adapter, miss_line)
+        t_file = time_checks(pdb_adapter, miss_file)
+        print(f"{n_breakpoints:>12} {t_line:>12.2f} {t_file:>12.2f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,271 @@
+"""
+Benchmark of the DAP messaging layer: messages per second and heap allocated per message.
+
+Uses typical `variables` and `stackTrace` sizes, sent and received over an in-memory socket
+stand-in so the numbers do not depend on the network, and only count the allocations of the messaging layer.
+A full stop is also sent once per encoding, JSON and the compact binary encoding that the
+host-side translator negotiates at `initialize`, to compare bytes on the wire and device time per stop.
+
+Run with the settrace firmware:
+    ./mpy.sh tests/mpy_bench_messaging.py
+"""
+
+import gc
+import json
+import sys
+import time
+
+sys.path.append("micropython-lib/python-ecosys/debugpy")
+from debugpy.common.messaging import JsonMessageChannel
+
+N_MESSAGES = 200
+# messages measured with the GC disabled, to count the heap allocated per message
+ALLOC_SAMPLES = 10
+# free heap left while sending a single large response, the smallest one that works is the peak heap used
+HEADROOMS = (1024, 2048, 4096, 8192, 16_384, 32_768, 65_536)
+BALLAST_BLOCK = 512
+
+
+class BenchSocket:
+    """Minimal socket stand-in, that does not copy or store the data.
+    Writes are counted and discarded, reads are served as memoryview slices of a preloaded buffer,
+    so only a small memoryview object per read adds to the allocations of the messaging layer.
+    """
+
+    def __init__(self):
+        self.writes = 0
+        self.bytes_written = 0
+        self.load(b"")
+
+    def write(self, data):
+        self.writes += 1
+        self.bytes_written += len(data)
+        return len(data)
+
+    send = write
+    sendall = write
+
+    def recv(self, size):
+        n = min(size, len(self.view) - self.read_pos)
+        data = self.view[self.read_pos : self.read_pos + n]
+        self.read_pos += n
+        return data
+
+    def readinto(self, buf, size=0):
+        size = size or len(buf)
+        n = min(size, len(self.view) - self.read_pos)
+        buf[:n] = self.view[self.read_pos : self.read_pos + n]
+        self.read_pos += n
+        return n
+
+    def settimeout(self, timeout):
+        pass
+
+    def setblocking(self, flag):
+        pass
+
+    def load(self, data):
+        """Set the bytes that following reads return."""
+        self.view = memoryview(data)
+        self.read_pos = 0
+
+    def reset(self):
+        self.writes = 0
+        self.bytes_written = 0
+
+
+def variables_body(n_vars=30):
+    return {
+        "variables": [
+            {"name": f"var_{i}", "value": f"'value {i}'", "type": "str", "variablesReference": 0}
+            for i in range(n_vars)
+        ]
+    }
+
+
+def stack_trace_body(n_frames=10):
+    return {
+        "stackFrames": [
+            {
+                "id": i,
+                "name": f"function_{i}",
+                "source": {"name": "target.py", "path": "/home/jos/mp_debugpy/src/target.py"},
+                "line": 10 + i,
+                "column": 1,
+            }
+            for i in range(n_frames)
+        ],
+        "totalFrames": n_frames,
+    }
+
+
+def scopes_body():
+    return {
+        "scopes": [
+            {"name": "Locals", "variablesReference": 1, "expensive": False},
+            {"name": "Globals", "variablesReference": 2, "expensive": False},
+        ]
+    }
+
+
+def stop_messages():
+    """Messages the device sends for a single stop, in order."""
+    return (
+        ("event", "stopped", {"reason": "breakpoint", "threadId": 1, "allThreadsStopped": True}),
+        ("response", "threads", {"threads": [{"id": 1, "name": "main"}]}),
+        ("response", "stackTrace", stack_trace_body(10)),
+        ("response", "scopes", scopes_body()),
+        ("response", "variables", variables_body(30)),
+    )
+
+
+def frame_request(seq, command, arguments):
+    body = json.dumps({"seq": seq, "type": "request", "command": command, "arguments": arguments})
+    return f"Content-Length: {len(body)}\r\n\r\n{body}".encode()
+
+
+def measure_alloc(func, n=ALLOC_SAMPLES):
+    """Return the bytes allocated per call of func, with the GC disabled."""
+    gc.collect()
+    gc.disable()
+    try:
+        before = gc.mem_alloc()
+        for i in range(n):
+            func(i)
+        return (gc.mem_alloc() - before) / n
+    finally:
+        gc.enable()
+
+
+def bench_send(channel, sock, command, body):
+    """Return (messages per second, bytes allocated per message, writes per message)."""
+
+    def send(seq):
+        channel.send_response(command, seq, body=body)
+
+    t_start = time.ticks_us()
+    for seq in range(N_MESSAGES):
+        send(seq)
+    elapsed = time.ticks_diff(time.ticks_us(), t_start)
+    sock.reset()
+    allocated = measure_alloc(send)
+    # header and body should go out in a single write
+    return N_MESSAGES * 1_000_000 / elapsed, allocated, sock.writes / ALLOC_SAMPLES
+
+
+def bench_recv(channel, sock, command, arguments):
+    """Return (messages per second, bytes allocated per message)."""
+
+    def fill(n):
+        # built outside the measured window
+        sock.load(b"".join(frame_request(seq, command, arguments) for seq in range(n)))
+
+    def recv(_):
+        channel.recv_message()
+
+    fill(N_MESSAGES)
+    t_start = time.ticks_us()
+    for i in range(N_MESSAGES):
+        recv(i)
+    elapsed = time.ticks_diff(time.ticks_us(), t_start)
+    fill(ALLOC_SAMPLES)
+    return N_MESSAGES * 1_000_000 / elapsed, measure_alloc(recv)
+
+
+def fill_heap(headroom):
+    """Allocate ballast until only about headroom bytes of the heap are free, and return it."""
+    ballast = []
+    gc.collect()
+    try:
+        while gc.mem_free() > headroom + BALLAST_BLOCK:
+            ballast.append(bytearray(BALLAST_BLOCK))
+    except MemoryError:
+        pass
+    return ballast
+
+
+def bench_peak_heap(channel, sock, n_vars):
+    """Return (smallest free heap that sending a variables response of n_vars entries succeeds in, JSON body size).
+    The body is built and measured first, so only the peak heap used by the encoder counts.
+    With a streaming encoder this is bounded by the output buffer, not by the payload size.
+    """
+    body = variables_body(n_vars)
+    payload = len(json.dumps(body))
+    for headroom in HEADROOMS:
+        sock.reset()
+        ballast = fill_heap(headroom)
+        try:
+            channel.send_response("variables", 0, body=body)
+            return headroom, payload
+        except MemoryError:
+            pass
+        finally:
+            del ballast
+    return None, payload
+
+
+def bench_stop(channel, sock, encoding, stops=20):
+    """Return (bytes on the wire per stop, microseconds per stop) for the given encoding."""
+    if hasattr(channel, "set_encoding"):
+        channel.set_encoding(encoding)
+    messages = stop_messages()
+
+    def send_stop():
+        for seq, (kind, name, body) in enumerate(messages):
+            if kind == "event":
+                channel.send_event(name, body=body)
+            else:
+                channel.send_response(name, seq, body=body)
+
+    sock.reset()
+    send_stop()
+    sent = sock.bytes_written
+    t_start = time.ticks_us()
+    for _ in range(stops):
+        send_stop()
+    elapsed = time.ticks_diff(time.ticks_us(), t_start)
+    if hasattr(channel, "set_encoding"):
+        channel.set_encoding("json")
+    return sent, elapsed / stops
+
+
+def run_benchmark():
+    sock = BenchSocket()
+    channel = JsonMessageChannel(sock)
+
+    print("DAP messaging benchmark")
+    print("=" * 60)
+    print(f"{'message':<24} {'msg/s':>10} {'bytes/msg':>12} {'writes/msg':>12}")
+    for name, body in (
+        ("variables (30)", variables_body(30)),
+        ("stackTrace (10)", stack_trace_body(10)),
+    ):
+        rate, allocated, writes = bench_send(channel, sock, name.split()[0], body)
+        print(f"{'send ' + name:<24} {rate:>10.0f} {allocated:>12.0f} {writes:>12.1f}")
+
+    for command, arguments in (
+        ("variables", {"variablesReference": 1001}),
+        ("stackTrace", {"threadId": 1, "startFrame": 0, "levels": 20}),
+    ):
+        rate, allocated = bench_recv(channel, sock, command, arguments)
+        print(f"{'recv ' + command:<24} {rate:>10.0f} {allocated:>12.0f}")
+
+    print()
+    print(f"{'variables response':<24} {'body bytes':>12} {'peak heap <=':>12}")
+    for n_vars in (50, 500):
+        headroom, payload = bench_peak_heap(channel, sock, n_vars)
+        peak = headroom if headroom else f">{HEADROOMS[-1]}"
+        print(f"{str(n_vars) + ' entries':<24} {payload:>12} {peak:>12}")
+
+    print()
+    print(f"{'encoding':<24} {'bytes/stop':>12} {'us/stop':>12}")
+    encodings = ("json", "binary") if hasattr(channel, "set_encoding") else ("json",)
+    for encoding in encodings:
+        sent, us_per_stop = bench_stop(channel, sock, encoding)
+        print(f"{encoding:<24} {sent:>12} {us_per_stop:>12.0f}")
+    if len(encodings) == 1:
+        print("Binary encoding not available")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,77 @@
+"""Test the native breakpoint filter: sys._set_breakpoints and sys._trace_all_lines."""
+
+import sys
+
+
+def traced_function():
+    a = 1
+    b = 2  # line 8: native breakpoint
+    c = a + b
+    return c
+
+
+BP_LINE = 8
+line_events = []
+
+
+def tracer(frame, event, arg):
+    if event == "line" and frame.f_code.co_name == "traced_function":
+        line_events.append(frame.f_lineno)
+    return tracer
+
+
+def run_traced():
+    """Run traced_function under the tracer and return the reported line numbers."""
+    line_events.clear()
+    sys.settrace(tracer)
+    traced_function()
+    sys.settrace(None)
+    return list(line_events)
+
+
+def test_filtered_lines(filename):
+    """Only the line with a breakpoint should reach the Python tracer."""
+    sys._set_breakpoints(filename, [BP_LINE])
+    lines = run_traced()
+    print(f"Filtered line events: {lines}")
+    return lines == [BP_LINE]
+
+
+def test_trace_all_lines(filename):
+    """With the step/pause flag set, every line should reach the Python tracer."""
+    sys._set_breakpoints(filename, [BP_LINE])
+    sys._trace_all_lines(True)
+    try:
+        lines = run_traced()
+    finally:
+        sys._trace_all_lines(False)
+    print(f"Unfiltered line events: {lines}")
+    return BP_LINE in lines and len(lines) > 1
+
+
+def test_cleared_breakpoints(filename):
+    """Clearing the breakpoints of a file should stop all line events for it."""
+    sys._set_breakpoints(filename, None)
+    lines = run_traced()
+    print(f"Line events without breakpoints: {lines}")
+    return lines == []
+
+
+if __name__ == "__main__":
+    print("Testing native breakpoint filter in MicroPython")
+    print("=" * 50)
+
+    if not hasattr(sys, "_set_breakpoints"):
+        print("sys._set_breakpoints not available")
+        print("You need a firmware compiled with the native breakpoint filter")
+        sys.exit(1)
+
+    filename = sys._getframe().f_code.co_filename
+    success1 = test_filtered_lines(filename)
+    success2 = test_trace_all_lines(filename)
+    success3 = test_cleared_breakpoints(filename)
+
+    if success1 and success2 and success3:
+        print("✓ All tests passed!")
+    else:
+        print("✗ Some tests failed")
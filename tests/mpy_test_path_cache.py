@@ -0,0 +1,98 @@
+"""
+Test the memoized path mapping of the PdbAdapter: hit rate counter, bound and invalidation.
+
+Run with the settrace firmware:
+    ./mpy.sh tests/mpy_test_path_cache.py
+"""
+
+import sys
+
+sys.path.append("micropython-lib/python-ecosys/debugpy")
+from debugpy.server.pdb_adapter import PdbAdapter
+
+MAPPINGS = [{"localRoot": "/home/jos/mp_debugpy/src", "remoteRoot": "."}]
+CLIENT_PATH = "/home/jos/mp_debugpy/src/target.py"
+DEVICE_PATH = "./target.py"
+
+
+def setup_adapter(mappings=MAPPINGS):
+    pdb_adapter = PdbAdapter()
+    pdb_adapter.set_path_mappings(mappings)
+    return pdb_adapter
+
+
+def stats(pdb_adapter):
+    return pdb_adapter.path_cache_stats["hits"], pdb_adapter.path_cache_stats["misses"]
+
+
+def test_hit_rate():
+    """Only the very first lookup should miss, it also fills the entry for the other direction."""
+    pdb_adapter = setup_adapter()
+    for _ in range(10):
+        device_path = pdb_adapter.map_to_device(CLIENT_PATH)
+        client_path = pdb_adapter.map_to_client(DEVICE_PATH)
+    hits, misses = stats(pdb_adapter)
+    print(f"device path: {device_path}, client path: {client_path}, hits: {hits}, misses: {misses}")
+    return device_path == DEVICE_PATH and client_path == CLIENT_PATH and misses == 1 and hits == 19
+
+
+def test_two_way():
+    """Resolving a path in one direction should also fill the cache for the other direction."""
+    pdb_adapter = setup_adapter()
+    pdb_adapter.map_to_device(CLIENT_PATH)
+    pdb_adapter.map_to_client(DEVICE_PATH)
+    hits, misses = stats(pdb_adapter)
+    print(f"hits: {hits}, misses: {misses}")
+    return hits == 1 and misses == 1
+
+
+def test_bound():
+    """The cache should not grow beyond its maximum size."""
+    pdb_adapter = setup_adapter()
+    max_size = pdb_adapter.path_cache_max
+    for i in range(max_size * 2):
+        pdb_adapter.map_to_client(f"./module_{i}.py")
+    cached = len(pdb_adapter.path_cache)
+    print(f"Cached paths: {cached}, max: {max_size}")
+    return cached <= max_size
+
+
+def test_invalidation():
+    """Changing the path mappings should clear the cache and resolve with the new mappings."""
+    pdb_adapter = setup_adapter()
+    pdb_adapter.map_to_device(CLIENT_PATH)
+    pdb_adapter.set_path_mappings([{"localRoot": "/home/jos/mp_debugpy/src", "remoteRoot": "/flash"}])
+    device_path = pdb_adapter.map_to_device(CLIENT_PATH)
+    hits, misses = stats(pdb_adapter)
+    print(f"device path after new mappings: {device_path}, hits: {hits}, misses: {misses}")
+    # setting the same mappings again keeps the cache
+    pdb_adapter.set_path_mappings([{"localRoot": "/home/jos/mp_debugpy/src", "remoteRoot": "/flash"}])
+    pdb_adapter.map_to_device(CLIENT_PATH)
+    hits_after, _ = stats(pdb_adapter)
+    return device_path == "/flash/target.py" and hits == 0 and hits_after == 1
+
+
+if __name__ == "__main__":
+    print("Testing path mapping cache in MicroPython")
+    print("=" * 50)
+
+    if not hasattr(PdbAdapter(), "path_cache_stats"):
+        print("PdbAdapter.path_cache_stats not available")
+        print("You need a micropython-lib version with the path mapping cache")
+        sys.exit(1)
+
+    results = []
+    for test in (
+        test_hit_rate,
+        test_two_way,
+        test_bound,
+        test_invalidation,
+    ):
+        print(f"\n{test.__name__}")
+        results.append(test())
+
+    print()
+    if all(results):
+        print("✓ All tests passed!")
+    else:
+        print("✗ Some tests failed")
@@ -0,0 +1,96 @@
+"""Test per-frame f_trace_lines and the global sys._settrace_events mask in MicroPython."""
+
+import sys
+
+# event bits for sys._settrace_events
+TRACE_CALL = 0x01
+TRACE_RETURN = 0x02
+TRACE_LINE = 0x04
+TRACE_EXCEPTION = 0x08
+TRACE_ALL = TRACE_CALL | TRACE_RETURN | TRACE_LINE | TRACE_EXCEPTION
+
+events = []
+# switch off line events for quiet_function from its call event
+quiet_off = False
+
+
+def quiet_function():
+    x = 1
+    y = 2
+    return x + y
+
+
+def stepped_function():
+    a = 10
+    b = 20
+    return a + b
+
+
+def run_both():
+    quiet_function()
+    stepped_function()
+
+
+def tracer(frame, event, arg):
+    co_name = frame.f_code.co_name
+    if co_name in ("quiet_function", "stepped_function"):
+        events.append((co_name, event))
+        if event == "call" and co_name == "stepped_function":
+            # a debugger switches on line events only for the frame it is stepping through
+            frame.f_trace_lines = True
+        elif event == "call" and co_name == "quiet_function" and quiet_off:
+            frame.f_trace_lines = False
+    return tracer
+
+
+def run_traced(mask, quiet=False):
+    global quiet_off
+    quiet_off = quiet
+    events.clear()
+    sys._settrace_events(mask)
+    sys.settrace(tracer)
+    try:
+        run_both()
+    finally:
+        sys.settrace(None)
+        sys._settrace_events(TRACE_ALL)
+    return list(events)
+
+
+def test_frame_trace_lines():
+    """f_trace_lines = False should suppress line events for that frame only."""
+    result = run_traced(TRACE_ALL, quiet=True)
+    print(f"Events: {result}")
+    quiet_lines = [e for e in result if e == ("quiet_function", "line")]
+    stepped_lines = [e for e in result if e == ("stepped_function", "line")]
+    return not quiet_lines and len(stepped_lines) == 3
+
+
+def test_global_mask():
+    """Without TRACE_LINE in the mask, new frames should start with f_trace_lines off."""
+    result = run_traced(TRACE_CALL | TRACE_RETURN | TRACE_EXCEPTION)
+    print(f"Events: {result}")
+    calls = [e for e in result if e[1] == "call"]
+    quiet_lines = [e for e in result if e == ("quiet_function", "line")]
+    stepped_lines = [e for e in result if e == ("stepped_function", "line")]
+    return len(calls) == 2 and not quiet_lines and len(stepped_lines) == 3
+
+
+if __name__ == "__main__":
+    print("Testing trace event mask in MicroPython")
+    print("=" * 50)
+
+    if not hasattr(sys, "_settrace_events"):
+        print("sys._settrace_events not available")
+        print("You need a firmware compiled with the trace event mask")
+        sys.exit(1)
+
+    success1 = test_frame_trace_lines()
+    print()
+    success2 = test_global_mask()
+    print()
+
+    if success1 and success2:
+        print("✓ All tests passed!")
+    else:
+        print("✗ Some tests failed")
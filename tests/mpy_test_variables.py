@@ -0,0 +1,321 @@
+"""
+Test variable retrieval of the PdbAdapter for large and nested containers.
+
+Run with the settrace firmware:
+    ./mpy.sh tests/mpy_test_variables.py
+"""
+
+import gc
+import sys
+import time
+
+sys.path.append("micropython-lib/python-ecosys/debugpy")
+from debugpy.server.pdb_adapter import VARREF_COMPLEX_BASE, PdbAdapter, VariableReferenceCache
+
+VARREF_LOCALS = 1  # frame_id * 1000 + scope type, see demo_enhanced_dap.py
+
+
+class MockFrame:
+    def __init__(self, locals_dict, globals_dict):
+        self.f_locals = locals_dict
+        self.f_globals = globals_dict
+
+
+def setup_adapter(locals_dict):
+    """Create an adapter with a single frame holding the given locals."""
+    pdb_adapter = PdbAdapter()
+    pdb_adapter.variables_cache[0] = MockFrame(locals_dict, {"global_var": "global_value"})
+    return pdb_adapter
+
+
+def find_var(variables, name):
+    return next((v for v in variables if v["name"] == name), None)
+
+
+def test_indexed_named_counts():
+    """Expandable containers should report indexedVariables / namedVariables."""
+    pdb_adapter = setup_adapter({"cheese_market": ["Cheddar"] * 120, "camelot": {"location": "England", "song": "Ni"}})
+    local_vars = pdb_adapter.get_variables(VARREF_LOCALS)
+    cheese_market = find_var(local_vars, "cheese_market")
+    camelot = find_var(local_vars, "camelot")
+    print(f"cheese_market: {cheese_market}")
+    print(f"camelot: {camelot}")
+    return (
+        cheese_market["variablesReference"] >= VARREF_COMPLEX_BASE
+        and cheese_market.get("indexedVariables") == 120
+        and camelot.get("namedVariables") == 2
+    )
+
+
+def test_range_groups():
+    """Large sequences should be grouped in ranges of 100 items."""
+    pdb_adapter = setup_adapter({"cheese_market": ["Cheddar"] * 120})
+    cheese_market = find_var(pdb_adapter.get_variables(VARREF_LOCALS), "cheese_market")
+    groups = pdb_adapter.get_variables(cheese_market["variablesReference"])
+    names = [group["name"] for group in groups]
+    print(f"Groups: {names}")
+    if names != ["[0..99]", "[100..119]"]:
+        return False
+    # a group expands to its own items
+    items = pdb_adapter.get_variables(groups[1]["variablesReference"])
+    print(f"Items in {groups[1]['name']}: {len(items)}")
+    return len(items) == 20 and items[0]["name"] == "[100]"
+
+
+def test_paging():
+    """start / count / filter should return a single page, produced from the live object."""
+    big_buffer = list(range(100_000))
+    pdb_adapter = setup_adapter({"big_buffer": big_buffer})
+    ref = find_var(pdb_adapter.get_variables(VARREF_LOCALS), "big_buffer")["variablesReference"]
+
+    gc.collect()
+    gc.disable()
+    try:
+        before = gc.mem_alloc()
+        t_start = time.ticks_us()
+        page = pdb_adapter.get_variables(ref, start=99_990, count=10, filter="indexed")
+        elapsed = time.ticks_diff(time.ticks_us(), t_start)
+        allocated = gc.mem_alloc() - before
+    finally:
+        gc.enable()
+    names = [v["name"] for v in page]
+    print(f"Page: {names} in {elapsed} us, allocated {allocated} bytes")
+
+    named = pdb_adapter.get_variables(ref, filter="named")
+    print(f"Named children of a list: {[v['name'] for v in named]}")
+    # a copy or a full listing of the 100k items would take several hundred KB
+    return (
+        names == [f"[{i}]" for i in range(99_990, 100_000)]
+        and page[0]["value"] == "99990"
+        and named == []
+        and allocated < 4096
+    )
+
+
+def make_locals(n_objects):
+    """Create fresh locals with n_objects expandable containers."""
+    return {f"obj_{i}": {"id": i, "payload": [i] * 10} for i in range(n_objects)}
+
+
+def expand_all(pdb_adapter, locals_dict):
+    """Simulate a stop where VS Code expands every container in the locals."""
+    pdb_adapter.variables_cache[0] = MockFrame(locals_dict, {})
+    refs = []
+    for var in pdb_adapter.get_variables(VARREF_LOCALS):
+        if var["variablesReference"] >= VARREF_COMPLEX_BASE:
+            pdb_adapter.get_variables(var["variablesReference"])
+            refs.append(var["variablesReference"])
+    return refs
+
+
+def test_generation_eviction(stops=100, objects_per_stop=100):
+    """Expanded objects should be released on resume, so the heap returns to its baseline."""
+    pdb_adapter = setup_adapter({})
+    # warm up once, so lazily created structures are part of the baseline
+    expand_all(pdb_adapter, make_locals(objects_per_stop))
+    pdb_adapter.continue_execution()
+    # measure both readings in the same state, without a frame holding the locals
+    pdb_adapter.variables_cache.clear()
+    gc.collect()
+    baseline = gc.mem_alloc()
+
+    stale_ref = 0
+    for _ in range(stops):
+        refs = expand_all(pdb_adapter, make_locals(objects_per_stop))
+        stale_ref = refs[-1]
+        pdb_adapter.continue_execution()
+    pdb_adapter.variables_cache.clear()
+    gc.collect()
+    leaked = gc.mem_alloc() - baseline
+    print(f"Expanded {stops * objects_per_stop} objects over {stops} stops, heap delta: {leaked} bytes")
+    print(f"Cached objects after resume: {len(pdb_adapter.var_cache.cache)}")
+
+    # a reference from a previous stop should give a clean error, not a stale object
+    try:
+        pdb_adapter.get_variables(stale_ref)
+        print("Stale reference was served")
+        stale_ok = False
+    except (KeyError, ValueError) as e:
+        print(f"Stale reference: {e}")
+        stale_ok = True
+    return leaked < 2048 and len(pdb_adapter.var_cache.cache) == 0 and stale_ok
+
+
+def test_lru_bound():
+    """Within a single stop the cache should stay bounded by max_size."""
+    pdb_adapter = setup_adapter({})
+    max_size = pdb_adapter.var_cache.max_size
+    expand_all(pdb_adapter, make_locals(max_size * 2))
+    cached = len(pdb_adapter.var_cache.cache)
+    print(f"Cached objects: {cached}, max_size: {max_size}")
+    return cached <= max_size
+
+
+def test_lru_order():
+    """Eviction should drop the least recently used reference, not the oldest one."""
+    cache = VariableReferenceCache(max_size=5)
+    refs = [cache.add_variable({"item": i}) for i in range(5)]
+    # using the oldest reference makes it the most recently used
+    cache.get_variable(refs[0])
+    new_ref = cache.add_variable({"item": 5})
+    kept = [ref for ref in refs if cache.get_variable(ref) is not None]
+    print(f"Kept after eviction: {kept} of {refs}")
+    return (
+        cache.get_variable(refs[0]) is not None
+        and cache.get_variable(refs[1]) is None
+        and cache.get_variable(new_ref) is not None
+    )
+
+
+def test_byte_bound():
+    """Large objects should be evicted on their approximate size, before the count limit is reached."""
+    cache = VariableReferenceCache(max_size=100)
+    max_bytes = cache.max_bytes
+    refs = [cache.add_variable(bytearray(max_bytes // 4)) for _ in range(8)]
+    kept = [ref for ref in refs if cache.get_variable(ref) is not None]
+    print(f"Cached {len(kept)} of {len(refs)} buffers, {cache.used_bytes} of {max_bytes} bytes")
+    return cache.used_bytes <= max_bytes and 0 < len(kept) < len(refs) and cache.get_variable(refs[-1]) is not None
+
+
+def test_bounded_values(value_limit=64):
+    """Values should be cut off at the byte limit with an ellipsis, without building the full repr."""
+    big_buffer = bytearray(100_000)
+    locals_dict = {
+        "big_buffer": big_buffer,
+        "big_bytes": bytes(range(256)) * 4,
+        "big_view": memoryview(big_buffer),
+        "long_str": "a" * 10_000,
+        "long_list": list(range(10_000)),
+        "big_int": 2**4096,
+        "small_float": 3.14,
+    }
+    pdb_adapter = setup_adapter(locals_dict)
+    pdb_adapter.value_limit = value_limit
+
+    gc.collect()
+    gc.disable()
+    try:
+        before = gc.mem_alloc()
+        local_vars = pdb_adapter.get_variables(VARREF_LOCALS)
+        allocated = gc.mem_alloc() - before
+    finally:
+        gc.enable()
+
+    ok = True
+    for var in local_vars:
+        print(f"{var['name']}: {var['value']!r} ({len(var['value'])} bytes)")
+        if len(var["value"]) > value_limit + 3:
+            ok = False
+    # a full repr of big_buffer alone would take several hundred KB
+    print(f"Allocated while formatting: {allocated} bytes")
+    small_float = find_var(local_vars, "small_float")
+    long_str = find_var(local_vars, "long_str")
+    return (
+        ok
+        and allocated < 16_384
+        and small_float["value"] == "3.14"
+        and long_str["value"].startswith("'aaaa")
+        and long_str["value"].endswith("...")
+    )
+
+
+def test_delta_updates(n_locals=40):
+    """A second stop in the same frame should only send added, changed and removed locals."""
+    locals_dict = {f"var_{i}": i for i in range(n_locals)}
+    locals_dict.update({"i": 0, "total": 0, "values": [1, 2, 3]})
+    frame = MockFrame(locals_dict, {})
+    pdb_adapter = setup_adapter({})
+    pdb_adapter.variables_cache[0] = frame
+
+    # the first stop in a frame has no fingerprints yet, so everything is sent
+    first = pdb_adapter.get_variables(VARREF_LOCALS, delta=True)
+    print(f"First stop: {len(first)} entries")
+    first_ok = len(first) == len(locals_dict)
+
+    # one loop iteration later
+    pdb_adapter.continue_execution()
+    locals_dict["i"] = 1
+    locals_dict["total"] = 1
+    locals_dict["values"].append(4)  # changed in place: same id, other length
+    locals_dict["item"] = "new"
+    del locals_dict["var_0"]
+    pdb_adapter.variables_cache[0] = frame
+    delta = pdb_adapter.get_variables(VARREF_LOCALS, delta=True)
+    print(f"Second stop: {delta}")
+
+    changed = sorted(v["name"] for v in delta if not v.get("removed"))
+    removed = [v["name"] for v in delta if v.get("removed")]
+    # without delta the full list is still available
+    full = pdb_adapter.get_variables(VARREF_LOCALS)
+    return (
+        first_ok
+        and changed == ["i", "item", "total", "values"]
+        and removed == ["var_0"]
+        and len(full) == len(locals_dict)
+    )
+
+
+def count_nodes(variables):
+    return sum(1 + count_nodes(v.get("children", [])) for v in variables)
+
+
+def test_subtree_prefetch():
+    """A depth request should return the nested subtree in one call, with references already cached."""
+    nested_dict = {
+        "user": {"profile": {"settings": ["dark_mode", "notifications"]}},
+        "metadata": {"created": "2025-01-01"},
+    }
+    pdb_adapter = setup_adapter({"nested_dict": nested_dict})
+    ref = find_var(pdb_adapter.get_variables(VARREF_LOCALS), "nested_dict")["variablesReference"]
+
+    tree = pdb_adapter.get_variables(ref, depth=3, budget=50)
+    user = find_var(tree, "user")
+    profile = find_var(user.get("children", []) if user else [], "profile")
+    settings = find_var(profile.get("children", []) if profile else [], "settings")
+    print(f"Subtree: {count_nodes(tree)} nodes, settings: {settings}")
+    if settings is None or "children" not in settings:
+        return False
+
+    # later expansions are served from the cache, without registering new objects
+    cached = len(pdb_adapter.var_cache.cache)
+    items = pdb_adapter.get_variables(settings["variablesReference"])
+    print(f"settings expanded from cache: {[v['value'] for v in items]}")
+    subtree_ok = [v["value"] for v in items] == ["'dark_mode'", "'notifications'"]
+    subtree_ok = subtree_ok and len(pdb_adapter.var_cache.cache) == cached
+
+    # the node budget bounds the size of the response
+    small_tree = pdb_adapter.get_variables(ref, depth=3, budget=3)
+    print(f"Subtree with budget 3: {count_nodes(small_tree)} nodes")
+    return subtree_ok and count_nodes(small_tree) <= 3
+
+
+if __name__ == "__main__":
+    print("Testing variable retrieval in MicroPython")
+    print("=" * 50)
+
+    results = []
+    for test in (
+        test_indexed_named_counts,
+        test_range_groups,
+        test_paging,
+        test_generation_eviction,
+        test_lru_bound,
+        test_lru_order,
+        test_byte_bound,
+        test_bounded_values,
+        test_delta_updates,
+        test_subtree_prefetch,
+    ):
+        print(f"\n{test.__name__}")
+        # an adapter without the feature under test raises, e.g. a TypeError for an unknown keyword
+        try:
+            results.append(test())
+        except Exception as e:
+            print(f"Error: {e}")
+            results.append(False)
+
+    print()
+    if all(results):
+        print("✓ All tests passed!")
+    else:
+        print("✗ Some tests failed")
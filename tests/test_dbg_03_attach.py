@@ -1,8 +1,12 @@
-import time
 from typing import List
 
 import pytest
-from helpers import wait_for_msg
+from helpers import configuration_done, last_response, wait_for_msg, wait_for_output
+
+# first line printed by target.main()
+TARGET_OUTPUT = "Running debuggable code..."
+# read the target output for at least this long, also when VS Code answers without delay
+MIN_READ_WINDOW = 0.2
 
 
 @pytest.mark.parametrize(
@@ -11,30 +15,42 @@ from helpers import wait_for_msg
         3,
         2,
         1,
-        # 0.8,
-        # 0.6,
-        # 0.4,
-        # 0.2,
+        0.8,
+        0.6,
+        0.4,
+        0.2,
+        0,
     ],
 )
 # @pytest.mark.parametrize("logToFile", [True, False], indirect=True)
-def test_debug_attach(attach_server, attach_delay):
+def test_debug_attach(attach_server, attach_delay, micropython_debuggee):
     """
     Test the debug attach functionality.
+    The launcher waits for configurationDone instead of a fixed delay,
+    so the target should not run before it, independent of the time VS Code takes.
     """
     server = attach_server
-    server.run_single()
-    time.sleep(attach_delay / 2)
-    server.run_single()
-    time.sleep(attach_delay / 2)
-    for _ in range(5):
-        time.sleep(0.1)
-        server.run_single()
-
-    if attach_delay < 2:
-        pytest.xfail(reason="Attach delay is too short, test may fail due to timing issues")
-    server = attach_server
-    last_msg = server.rcv_messages[-1] if server.rcv_messages else None
-    assert last_msg is not None, "Last message should not be None"
-    assert last_msg.type == "response", f"Expected response message, got {last_msg.type}"
-    assert last_msg.command == "attach", f"Expected command 'attach', got {last_msg.command}"
+    client = server.client
+
+    # continue from debugpy.breakpoint(), the launcher then waits for configurationDone
+    client.continue_(thread_id=1)
+    output = wait_for_output(micropython_debuggee, "Waiting for VS Code to finish configuration", server=server)
+    # VS Code taking its time to set breakpoints
+    timeout = max(attach_delay, MIN_READ_WINDOW)
+    output += wait_for_output(micropython_debuggee, TARGET_OUTPUT, server=server, timeout=timeout)
+    ran_early = TARGET_OUTPUT in output
+
+    configuration_done(server)
+    wait_for_msg(server, response="configurationDone")
+    assert last_response(server, "configurationDone") is not None, "Expected a configurationDone response"
+    responses = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "attach"]
+    assert len(responses) == 1, f"Expected 1 attach response, got {len(responses)}"
+    assert responses[0].success, "Attach should succeed"
+
+    if not ran_early:
+        output += wait_for_output(micropython_debuggee, TARGET_OUTPUT, server=server)
+    assert TARGET_OUTPUT in output, f"Expected the target to run after configurationDone, got: {output}"
+
+    if "Giving VS Code time to set breakpoints" in output:
+        pytest.xfail(reason="needs debugpy.wait_for_client(timeout) from micropython-lib")
+    assert not ran_early, "The target should not run before configurationDone"
@@ -2,7 +2,7 @@ import time
 from typing import List
 
 import pytest
-from helpers import set_breakpoints, wait_for_msg
+from helpers import configuration_done, set_breakpoints, set_exception_breakpoints, set_function_breakpoints, wait_for_msg
 
 
 @pytest.mark.parametrize(
@@ -27,6 +27,7 @@ def test_debug_breakpoints(
 
     set_breakpoints(server, source_file, bp_lines)
     wait_for_msg(server, response="setBreakpoints")
+    configuration_done(server)
 
     # Check that the debugee responds to the setBreakpoints request
     responses = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "setBreakpoints"]
@@ -95,3 +96,275 @@ def test_debug_breakpoints(
 #         assert bp["line"] in bp_lines_2, f"Unexpected breakpoint line: {bp['line']}"
 #         assert bp["verified"] is True, f"Breakpoint at line {bp['line']} should be verified"
 #         assert bp["source"]["path"] == source_file, f"Breakpoint at line {bp['line']} should be in {source_file}"
+
+
+@pytest.mark.parametrize(
+    "source_file, bp_lines",
+    [
+        ("/home/jos/mp_debugpy/src/target.py", [78, 89, 90]),
+    ],
+)
+@pytest.mark.parametrize("local_root", ["/home/jos/mp_debugpy/src"], indirect=True)
+def test_debug_breakpoints_path_mapping(
+    attach_server,
+    source_file: str,
+    bp_lines: List,
+    local_root: str,
+    micropython_debuggee,
+):
+    """
+    Repeated setBreakpoints and stackTrace requests for the same file
+    should resolve to the same client path every time.
+    The memo cache itself (hit rate, bound, invalidation) is tested in mpy_test_path_cache.py.
+    """
+    server = attach_server
+    client = server.client
+
+    for _ in range(2):
+        set_breakpoints(server, source_file, bp_lines, wait=True)
+    responses = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "setBreakpoints"]
+    assert len(responses) == 2, f"Expected 2 setBreakpoints responses, got {len(responses)}"
+    for bp_response in responses:
+        for bp in bp_response.body["breakpoints"]:
+            assert bp["source"]["path"] == source_file, f"Breakpoint at line {bp['line']} should be in {source_file}"
+    configuration_done(server)
+
+    client.continue_(thread_id=1)
+    server.clear_messages()
+    assert wait_for_msg(server, event="stopped"), "Expected breakpoint to be hit"
+
+    for _ in range(2):
+        client.stack_trace(thread_id=1)
+        wait_for_msg(server, response="stackTrace")
+    traces = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "stackTrace"]
+    assert len(traces) == 2, f"Expected 2 stackTrace responses, got {len(traces)}"
+
+    top_paths = [trace.body["stackFrames"][0]["source"]["path"] for trace in traces]
+    assert top_paths[0] == top_paths[1], f"Stack frame paths should be stable, got {top_paths}"
+    assert top_paths[0].startswith(local_root), f"Expected {top_paths[0]} to be mapped into {local_root}"
+
+
+@pytest.mark.xfail(reason="needs micropython-lib PdbAdapter with conditional breakpoints")
+@pytest.mark.parametrize("tgt_module", ["hit_loop"], indirect=True)
+@pytest.mark.parametrize(
+    "source_file, bp_lines, condition, expected",
+    [
+        ("/home/jos/mp_debugpy/src/hit_loop.py", [9], "i == 5", "5"),
+        ("/home/jos/mp_debugpy/src/hit_loop.py", [9], "i > 0 and i % 1000 == 0", "1000"),
+    ],
+)
+def test_debug_conditional_breakpoint(
+    attach_server,
+    source_file: str,
+    bp_lines: List,
+    condition: str,
+    expected: str,
+    micropython_debuggee,
+):
+    """
+    A conditional breakpoint should only stop when its condition is true.
+    The condition is evaluated on the device against the locals of the frame.
+    """
+    server = attach_server
+    client = server.client
+
+    set_breakpoints(server, source_file, bp_lines, condition=condition)
+    wait_for_msg(server, response="setBreakpoints")
+    configuration_done(server)
+    responses = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "setBreakpoints"]
+    assert len(responses) == 1, f"Expected 1 setBreakpoints response, got {len(responses)}"
+    for bp in responses[0].body["breakpoints"]:
+        assert bp["verified"] is True, f"Breakpoint at line {bp['line']} should be verified"
+
+    client.continue_(thread_id=1)
+    server.clear_messages()
+    assert wait_for_msg(server, event="stopped"), "Expected conditional breakpoint to be hit"
+    assert server.rcv_messages[-1].body["reason"] == "breakpoint"
+
+    client.stack_trace(thread_id=1)
+    wait_for_msg(server, response="stackTrace")
+    trace = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "stackTrace"][-1]
+    frame_id = trace.body["stackFrames"][0]["id"]
+
+    client.evaluate("i", frame_id=frame_id)
+    wait_for_msg(server, response="evaluate")
+    result = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "evaluate"][-1]
+    assert result.body["result"] == expected, f"Expected to stop with i == {expected}, got {result.body['result']}"
+
+
+@pytest.mark.xfail(reason="needs micropython-lib PdbAdapter with hit count breakpoints")
+@pytest.mark.parametrize("tgt_module", ["hit_loop"], indirect=True)
+@pytest.mark.parametrize(
+    "source_file, bp_lines, hit_condition, expected",
+    [
+        ("/home/jos/mp_debugpy/src/hit_loop.py", [9], "5", "4"),
+        ("/home/jos/mp_debugpy/src/hit_loop.py", [9], ">= 100", "99"),
+        ("/home/jos/mp_debugpy/src/hit_loop.py", [9], "% 250", "249"),
+    ],
+)
+def test_debug_hit_count_breakpoint(
+    attach_server,
+    source_file: str,
+    bp_lines: List,
+    hit_condition: str,
+    expected: str,
+    micropython_debuggee,
+):
+    """
+    A hit count breakpoint should only stop when the hit count of the breakpoint matches.
+    The hits are counted on the device.
+    """
+    server = attach_server
+    client = server.client
+
+    set_breakpoints(server, source_file, bp_lines, hitCondition=hit_condition)
+    wait_for_msg(server, response="setBreakpoints")
+    configuration_done(server)
+
+    client.continue_(thread_id=1)
+    server.clear_messages()
+    assert wait_for_msg(server, event="stopped"), "Expected hit count breakpoint to be hit"
+
+    client.stack_trace(thread_id=1)
+    wait_for_msg(server, response="stackTrace")
+    trace = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "stackTrace"][-1]
+    frame_id = trace.body["stackFrames"][0]["id"]
+
+    client.evaluate("i", frame_id=frame_id)
+    wait_for_msg(server, response="evaluate")
+    result = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "evaluate"][-1]
+    assert result.body["result"] == expected, f"Expected to stop with i == {expected}, got {result.body['result']}"
+
+
+@pytest.mark.xfail(reason="needs micropython-lib PdbAdapter with logpoints")
+@pytest.mark.parametrize("tgt_module", ["hit_loop"], indirect=True)
+@pytest.mark.parametrize(
+    "logpoint_flush",
+    [
+        {"maxBytes": 4096, "intervalMs": 10_000, "onStop": True},
+    ],
+    indirect=True,
+)
+def test_debug_logpoints(attach_server, logpoint_flush, micropython_debuggee):
+    """
+    Logpoints should not stop, but format their message on the device.
+    The messages are buffered and flushed as a few coalesced output events,
+    here at the latest when the breakpoint after the loop is hit.
+    """
+    server = attach_server
+    client = server.client
+    source_file = "/home/jos/mp_debugpy/src/hit_loop.py"
+
+    client.set_breakpoints(
+        source={"name": "hit_loop.py", "path": source_file},
+        breakpoints=[
+            {"line": 9, "condition": "i % 1000 == 0", "logMessage": "i={i} total={total}"},
+            {"line": 16},
+        ],
+        source_modified=False,
+    )
+    wait_for_msg(server, response="setBreakpoints")
+    configuration_done(server)
+
+    client.continue_(thread_id=1)
+    server.clear_messages()
+    assert wait_for_msg(server, event="stopped", timeout=30), "Expected to stop after the loop"
+
+    stopped_events = [msg for msg in server.rcv_messages if msg.type == "event" and msg.event == "stopped"]
+    assert len(stopped_events) == 1, f"Logpoints should not stop, got {len(stopped_events)} stopped events"
+
+    # logpoint messages are sent in the console category, program output is not
+    output_events = [
+        msg
+        for msg in server.rcv_messages
+        if msg.type == "event" and msg.event == "output" and msg.body.get("category") == "console"
+    ]
+    output = "".join(msg.body["output"] for msg in output_events)
+    for i in range(0, 10_000, 1000):
+        assert f"i={i} total=" in output, f"Expected logpoint message for i={i} in {output!r}"
+    # 10 messages fit in a single buffer, which is flushed before the stopped event
+    assert len(output_events) <= 2, f"Expected coalesced output events, got {len(output_events)}"
+
+
+@pytest.mark.xfail(reason="needs micropython-lib PdbAdapter with function breakpoints")
+@pytest.mark.parametrize("tgt_method", ["fire_drill"], indirect=True)
+@pytest.mark.parametrize(
+    "function_name, co_name",
+    [
+        ("building.DoorController.toggle", "toggle"),
+        ("building.Door.open", "open"),
+    ],
+)
+def test_debug_function_breakpoints(attach_server, function_name: str, co_name: str, micropython_debuggee):
+    """
+    A function breakpoint should stop on entry of the function.
+    It is matched on the call event only, so no line events are needed while running.
+    """
+    server = attach_server
+    client = server.client
+
+    set_function_breakpoints(server, [function_name])
+    wait_for_msg(server, response="setFunctionBreakpoints")
+    configuration_done(server)
+    responses = [
+        msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "setFunctionBreakpoints"
+    ]
+    assert len(responses) == 1, f"Expected 1 setFunctionBreakpoints response, got {len(responses)}"
+    assert responses[0].body["breakpoints"][0]["verified"] is True, "Function breakpoint should be verified"
+
+    client.continue_(thread_id=1)
+    server.clear_messages()
+    assert wait_for_msg(server, event="stopped"), "Expected function breakpoint to be hit"
+    reason = server.rcv_messages[-1].body["reason"]
+    assert reason == "function breakpoint", f"Expected 'function breakpoint', got {reason}"
+
+    client.stack_trace(thread_id=1)
+    wait_for_msg(server, response="stackTrace")
+    trace = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "stackTrace"][-1]
+    top_frame = trace.body["stackFrames"][0]
+    assert top_frame["name"] == co_name, f"Expected to stop in {co_name}, got {top_frame['name']}"
+
+
+@pytest.mark.xfail(reason="needs micropython-lib PdbAdapter with exception breakpoints")
+@pytest.mark.parametrize("tgt_module", ["exception_demo"], indirect=True)
+@pytest.mark.parametrize(
+    "exception_types, expected_attempt",
+    [
+        (None, "0"),  # the first ValueError
+        (["OSError"], "4"),  # the ValueErrors are filtered on the device
+    ],
+)
+def test_debug_exception_breakpoints(attach_server, exception_types, expected_attempt: str, micropython_debuggee):
+    """
+    A raised exception breakpoint should stop on the first exception that matches the type filter.
+    """
+    server = attach_server
+    client = server.client
+
+    set_exception_breakpoints(server, ["raised"], exception_types)
+    wait_for_msg(server, response="setExceptionBreakpoints")
+    configuration_done(server)
+    responses = [
+        msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "setExceptionBreakpoints"
+    ]
+    assert len(responses) == 1, f"Expected 1 setExceptionBreakpoints response, got {len(responses)}"
+    assert responses[0].success, "setExceptionBreakpoints should succeed"
+
+    client.continue_(thread_id=1)
+    server.clear_messages()
+    assert wait_for_msg(server, event="stopped"), "Expected exception breakpoint to be hit"
+    reason = server.rcv_messages[-1].body["reason"]
+    assert reason == "exception", f"Expected 'exception', got {reason}"
+
+    client.stack_trace(thread_id=1)
+    wait_for_msg(server, response="stackTrace")
+    trace = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "stackTrace"][-1]
+    top_frame = trace.body["stackFrames"][0]
+    assert top_frame["name"] == "connect", f"Expected to stop in connect, got {top_frame['name']}"
+
+    client.evaluate("attempt", frame_id=top_frame["id"])
+    wait_for_msg(server, response="evaluate")
+    result = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "evaluate"][-1]
+    assert result.body["result"] == expected_attempt, (
+        f"Expected to stop on attempt {expected_attempt}, got {result.body['result']}"
+    )
@@ -3,7 +3,7 @@ from concurrent.futures import thread
 from typing import TYPE_CHECKING, List
 
 import pytest
-from helpers import PerfServer, set_breakpoints, wait_for_msg
+from helpers import PerfServer, configuration_done, set_breakpoints, wait_for_msg
 
 
 # TODO: run a micropython module from the test scripts folder.
@@ -25,6 +25,7 @@ def test_debug_continue(attach_server, source_file: str, bp_lines: List, micropy
     # Set breakpoints in the debug server
     set_breakpoints(server, source_file, bp_lines)
     wait_for_msg(server, response="setBreakpoints")
+    configuration_done(server)
 
     # Check that the debugee responds to the setBreakpoints request
     responses = [msg for msg in server.rcv_messages if msg.type == "response" and msg.command == "setBreakpoints"]
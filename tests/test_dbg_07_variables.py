@@ -0,0 +1,61 @@
+from typing import List
+
+import pytest
+from helpers import configuration_done, last_response, set_breakpoints, wait_for_msg
+
+
+def stop_and_get_locals(server, source_file: str, bp_lines: List):
+    """Continue to the breakpoint and return the local variables of the top frame."""
+    client = server.client
+    set_breakpoints(server, source_file, bp_lines)
+    wait_for_msg(server, response="setBreakpoints")
+    configuration_done(server)
+
+    client.continue_(thread_id=1)
+    server.clear_messages()
+    assert wait_for_msg(server, event="stopped"), "Expected breakpoint to be hit"
+
+    client.stack_trace(thread_id=1)
+    wait_for_msg(server, response="stackTrace")
+    frame_id = last_response(server, "stackTrace").body["stackFrames"][0]["id"]
+
+    client.scopes(frame_id=frame_id)
+    wait_for_msg(server, response="scopes")
+    scopes = last_response(server, "scopes").body["scopes"]
+    locals_ref = next(scope for scope in scopes if scope["name"] == "Locals")["variablesReference"]
+
+    client.variables(locals_ref)
+    wait_for_msg(server, response="variables")
+    return last_response(server, "variables").body["variables"]
+
+
+@pytest.mark.xfail(reason="needs micropython-lib PdbAdapter with paged variables")
+@pytest.mark.parametrize(
+    "source_file, bp_lines",
+    [
+        ("/home/jos/mp_debugpy/src/target.py", [73]),
+    ],
+)
+def test_debug_variables_paging(attach_server, source_file: str, bp_lines: List, micropython_debuggee):
+    """
+    Large containers report indexedVariables and are served one page at a time.
+    cheese_market in target.inspect_local_variables() holds 120 items.
+    """
+    server = attach_server
+    client = server.client
+
+    local_vars = stop_and_get_locals(server, source_file, bp_lines)
+    cheese_market = next((v for v in local_vars if v["name"] == "cheese_market"), None)
+    assert cheese_market is not None, "cheese_market should be in the locals"
+    assert cheese_market["indexedVariables"] == 120, f"Expected 120 indexed variables, got {cheese_market}"
+
+    client.variables(cheese_market["variablesReference"], filter="indexed", start=100, count=20)
+    wait_for_msg(server, response="variables")
+    page = last_response(server, "variables").body["variables"]
+    assert [v["name"] for v in page] == [f"[{i}]" for i in range(100, 120)], f"Unexpected page: {page}"
+
+    # without paging arguments, large sequences are grouped in ranges
+    client.variables(cheese_market["variablesReference"])
+    wait_for_msg(server, response="variables")
+    groups = last_response(server, "variables").body["variables"]
+    assert [g["name"] for g in groups] == ["[0..99]", "[100..119]"], f"Unexpected groups: {groups}"